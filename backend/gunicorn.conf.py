@@ -0,0 +1,24 @@
+# Production server: several Uvicorn workers under gunicorn.
+# The app is imported and the saved model loaded once in the master process before
+# workers are forked, so all workers share one copy of the model in memory. After a
+# /train in any worker, the others reload the saved file on their next request.
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    # runs in the master after the preloaded app import, before any worker is forked
+    import main
+
+    if os.path.exists(main.MODEL_PATH):
+        try:
+            main.load_model(main.MODEL_PATH)
+            server.log.info("Model preloaded from %s", main.MODEL_PATH)
+        except Exception as e:
+            # workers start without a model and retry loading it on their first request
+            server.log.error("Could not preload model from %s: %s", main.MODEL_PATH, e)
@@ -1,25 +1,56 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import pandas as pd
 import numpy as np
+
+# stock sklearn class, bound before any patching; sklearnex's estimator subclasses it
+from sklearn.linear_model import LogisticRegression as StockLogisticRegression
+
+try:
+    # Intel's oneDAL-backed LogisticRegression is a drop-in replacement; patch only that
+    # estimator, before it is imported below. Models trained this way pickle the
+    # sklearnex class, so loading them needs scikit-learn-intelex installed
+    from sklearnex import patch_sklearn
+    patch_sklearn(["LogisticRegression"])
+except ImportError:
+    pass
+
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
+from sklearn.metrics import roc_auc_score, confusion_matrix
+from scipy.special import expit
 import joblib
+from joblib import Parallel, delayed, effective_n_jobs
+import asyncio
 import os
+import pickle
 import tempfile
+import threading
 from typing import Dict, List, Any, Optional
-import io
+from collections import OrderedDict
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
 
 app = FastAPI(
     title="Churn Analysis API",
     description="API for customer churn prediction and analysis with automatic model training",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -30,13 +61,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-model = None
-pipeline = None
-feature_columns = None
-target_column = None
-categorical_columns = None
-numerical_columns = None
-categorical_values: Optional[Dict[str, List[str]]] = None
+# Everything derived from the current model, published with one assignment so a request
+# never pairs one model's columns with another model's pipeline; see apply_model_data
+model_state: Optional[Dict[str, Any]] = None
+# /train runs in the threadpool; only one training run at a time
+training_lock = threading.Lock()
+
+MODEL_PATH = "model/model.joblib"
+# mkstemp creates files as 0600; saved models get the usual umask-based mode instead.
+# Read once at import, while only one thread runs, since os.umask can only be read by setting it
+_umask = os.umask(0)
+os.umask(_umask)
+MODEL_FILE_MODE = 0o666 & ~_umask
+# each worker process holds its own model; it reloads when the saved file changes
+model_reload_lock = threading.Lock()
+# (file version, message) of a saved model that failed to load, so it isn't retried per request
+model_load_error: Optional[tuple[tuple, str]] = None
+
+# Churn_Modelling.csv columns used for training; identifiers and surnames are left out
+CHURN_DTYPES = {
+    'CreditScore': 'int32',
+    'Geography': 'category',
+    'Gender': 'category',
+    'Age': 'int16',
+    'Tenure': 'int8',
+    'Balance': 'float32',
+    'NumOfProducts': 'int8',
+    'HasCrCard': 'int8',
+    'IsActiveMember': 'int8',
+    'EstimatedSalary': 'float32',
+    'Exited': 'int8'
+}
+
+BATCH_CHUNK_SIZE = 50_000
+NUMEXPR_MIN_SIZE = 4096
+PARALLEL_PART_SIZE = 10_000
+
+# /predict requests queued together are scored together; a batch keeps collecting while
+# requests are still arriving, for at most PREDICT_BATCH_WINDOW seconds
+PREDICT_MAX_BATCH = 64
+PREDICT_BATCH_WINDOW = 0.005
+prediction_queue: Optional[asyncio.Queue] = None
+prediction_worker: Optional[asyncio.Task] = None
+
+# LRU of /predict results keyed on the ordered feature values; each model state has its own
+PREDICTION_CACHE_SIZE = 8192
 
 class PredictionInput(BaseModel):
     pass
@@ -53,13 +122,53 @@ class TrainingResponse(BaseModel):
     categorical_columns: List[str]
     numerical_columns: List[str]
 
+def arrow_type(dtype: str):
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+def read_csv(source, dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    # with dtype given, only those columns are read and no type inference is needed
+    usecols = list(dtype) if dtype else None
+    # pyarrow parses columns in parallel; fall back to pandas when it isn't installed
+    if pacsv is not None:
+        read_options = pacsv.ReadOptions(use_threads=True, block_size=32 << 20)
+        column_types = {c: arrow_type(t) for c, t in (dtype or {}).items()}
+
+        def read(column_types):
+            # empty and NA-like strings become nulls, as pandas' default na_values do
+            convert_options = pacsv.ConvertOptions(
+                column_types=column_types,
+                include_columns=usecols,
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True
+            )
+            return pacsv.read_csv(source, read_options=read_options, convert_options=convert_options)
+
+        table = read(column_types)
+        # pandas doesn't parse dates and reads all-empty columns as float NaN; re-read
+        # the few columns arrow inferred differently with the types pandas would give
+        overrides = {
+            field.name: pa.string() if pa.types.is_temporal(field.type) else pa.float64()
+            for field in table.schema
+            if pa.types.is_temporal(field.type) or pa.types.is_null(field.type)
+        }
+        if overrides:
+            table = read({**column_types, **overrides})
+        return table.to_pandas()
+    return pd.read_csv(source, dtype=dtype, usecols=usecols)
+
 def detect_column_types(df: pd.DataFrame) -> tuple[List[str], List[str]]:
     numerical: List[str] = []
     categorical: List[str] = []
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
+    dtypes = df.dtypes
+    # one nunique pass over just the integer columns, the only ones it decides
+    integer_cols = [col for col, dtype in dtypes.items() if pd.api.types.is_integer_dtype(dtype)]
+    nunique = df[integer_cols].nunique(dropna=True)
+    for col, dtype in dtypes.items():
+        if pd.api.types.is_numeric_dtype(dtype):
             # treat low-cardinality integers as categorical
-            if pd.api.types.is_integer_dtype(df[col]) and df[col].nunique(dropna=True) <= 10:
+            if col in nunique.index and nunique[col] <= 10:
                 categorical.append(col)
             else:
                 numerical.append(col)
@@ -67,6 +176,23 @@ def detect_column_types(df: pd.DataFrame) -> tuple[List[str], List[str]]:
             categorical.append(col)
     return numerical, categorical
 
+def coerce_numeric_columns(df: pd.DataFrame, numerical_cols: List[str]) -> tuple[pd.DataFrame, Optional[str]]:
+    # columns the parser already typed as numeric need no conversion
+    pending = [c for c in numerical_cols if not pd.api.types.is_numeric_dtype(df[c])]
+    if not pending:
+        return df, None
+    try:
+        converted = df[pending].apply(pd.to_numeric, errors='raise')
+    except (ValueError, TypeError):
+        # only on failure: find the offending column for the error message
+        for col in pending:
+            try:
+                pd.to_numeric(df[col], errors='raise')
+            except (ValueError, TypeError):
+                return df, col
+        raise
+    return df.assign(**{c: converted[c] for c in pending}), None
+
 def detect_target_column(df: pd.DataFrame, target_param: Optional[str] = None) -> str:
     if target_param:
         if target_param in df.columns:
@@ -98,25 +224,263 @@ def create_pipeline(categorical_cols: List[str], numerical_cols: List[str]):
         ('classifier', LogisticRegression(random_state=42, max_iter=1000))
     ])
 
+def build_linear_scorer(model_pipeline: Pipeline, feature_cols: List[str], categorical_cols: List[str], numerical_cols: List[str]) -> Optional[Dict[str, Any]]:
+    # Fold the fitted OneHotEncoder/StandardScaler into the logistic regression weights so
+    # inference is a single dot product instead of a walk through the sklearn pipeline
+    classifier = model_pipeline.named_steps['classifier']
+    if not isinstance(classifier, StockLogisticRegression) or classifier.coef_.shape[0] != 1:
+        return None
+    preprocessor = model_pipeline.named_steps['preprocessor']
+    position = {c: i for i, c in enumerate(feature_cols)}
+    coef = classifier.coef_[0]
+    intercept = float(classifier.intercept_[0])
+    offset = 0
+    categorical_weights: List[tuple[int, Dict[Any, float]]] = []
+    if categorical_cols:
+        encoder = preprocessor.named_transformers_['cat']
+        drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(categorical_cols)
+        for col, categories, dropped in zip(categorical_cols, encoder.categories_, drop_idx):
+            weights = {}
+            # dropped and unseen categories encode to all zeros, i.e. contribute no weight
+            for i, category in enumerate(categories.tolist()):
+                if i == dropped:
+                    continue
+                weights[category] = float(coef[offset])
+                offset += 1
+            categorical_weights.append((position[col], weights))
+    numerical_weights = np.zeros(0)
+    if numerical_cols:
+        scaler = preprocessor.named_transformers_['num']
+        numerical_weights = coef[offset:offset + len(numerical_cols)] / scaler.scale_
+        intercept -= float(numerical_weights @ scaler.mean_)
+        offset += len(numerical_cols)
+    if offset != len(coef):
+        return None
+    return {
+        "intercept": intercept,
+        "numerical_positions": [position[c] for c in (numerical_cols or [])],
+        "numerical_weights": numerical_weights,
+        "categorical_weights": categorical_weights,
+        "classes": classifier.classes_
+    }
+
+def linear_decision_function(scorer: Dict[str, Any], X) -> np.ndarray:
+    # X holds the features in training order: a DataFrame for batch chunks, or an
+    # object ndarray of rows for /predict
+    is_frame = isinstance(X, pd.DataFrame)
+    z = np.full(len(X), scorer["intercept"])
+    if scorer["numerical_positions"]:
+        if is_frame:
+            values = X.iloc[:, scorer["numerical_positions"]].to_numpy(dtype=float)
+        else:
+            values = X[:, scorer["numerical_positions"]].astype(float)
+        if not np.isfinite(values).all():
+            raise ValueError("Input X contains NaN or infinity.")
+        z += values @ scorer["numerical_weights"]
+    for pos, weights in scorer["categorical_weights"]:
+        if is_frame:
+            z += X.iloc[:, pos].map(weights).fillna(0.0).to_numpy(dtype=float)
+        else:
+            z += np.array([weights.get(v, 0.0) for v in X[:, pos]], dtype=float)
+    return z
+
+def sigmoid(z: np.ndarray) -> np.ndarray:
+    # numexpr fuses the expression into one multithreaded pass without temporaries; below a few
+    # thousand rows its dispatch overhead outweighs that, so small batches use scipy's stable expit
+    if ne is not None and z.size >= NUMEXPR_MIN_SIZE:
+        # exp(-z) overflowing to inf for very negative z correctly yields 0
+        return ne.evaluate("1 / (1 + exp(-z))")
+    return expit(z)
+
+def predict_frame(model_pipeline: Pipeline, scorer: Optional[Dict[str, Any]], X) -> tuple[np.ndarray, np.ndarray]:
+    if scorer is not None:
+        z = linear_decision_function(scorer, X)
+        return scorer["classes"][(z > 0).astype(int)], sigmoid(z)
+    if not isinstance(X, pd.DataFrame):
+        # the pipeline selects columns by name; /predict rows arrive as a plain array
+        X = pd.DataFrame(X, columns=model_pipeline.feature_names_in_)
+    proba = model_pipeline.predict_proba(X)
+    # same rule LogisticRegression.predict applies to the decision function
+    return model_pipeline.classes_[proba.argmax(axis=1)], proba[:, 1]
+
+def predict_frame_parallel(model_pipeline: Pipeline, scorer: Optional[Dict[str, Any]], df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    # Large frames are scored in row slices across cores; the threading backend avoids
+    # pickling the frame and numpy/BLAS release the GIL for the heavy parts
+    n_jobs = effective_n_jobs(-1)
+    if n_jobs < 2 or len(df) < 2 * PARALLEL_PART_SIZE:
+        return predict_frame(model_pipeline, scorer, df)
+    parts = [df.iloc[i:i + PARALLEL_PART_SIZE] for i in range(0, len(df), PARALLEL_PART_SIZE)]
+    results = Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(predict_frame)(model_pipeline, scorer, part) for part in parts
+    )
+    return np.concatenate([preds for preds, _ in results]), np.concatenate([proba for _, proba in results])
+
+def model_file_version(model_path: str) -> tuple:
+    # os.replace gives every save a new inode, so this changes even within one mtime tick
+    stat = os.stat(model_path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def apply_model_data(model_data: Dict[str, Any], file_version: Optional[tuple] = None):
+    global model_state
+    feature_cols = model_data.get("feature_columns")
+    numerical_cols = model_data.get("numerical_columns")
+    scorer = model_data.get("linear_scorer")
+    if scorer is None and model_data.get("pipeline") is not None:
+        # model files saved before the scorer existed
+        scorer = build_linear_scorer(model_data["pipeline"], feature_cols, model_data.get("categorical_columns"), numerical_cols)
+    model_state = {
+        "pipeline": model_data.get("pipeline"),
+        "linear_scorer": scorer,
+        "feature_columns": feature_cols,
+        "target_column": model_data.get("target_column"),
+        "categorical_columns": model_data.get("categorical_columns"),
+        "numerical_columns": numerical_cols,
+        "categorical_values": model_data.get("categorical_values"),
+        # built once per model so request validation doesn't rebuild them
+        "feature_columns_set": frozenset(feature_cols or []),
+        "numerical_columns_set": frozenset(numerical_cols or []),
+        "prediction_cache": OrderedDict(),
+        "file_version": file_version
+    }
+
+def load_model(model_path: str):
+    # compressed files can't be memory-mapped; workers forked after a preload still
+    # share the loaded arrays' pages copy-on-write. Stat first: a file replaced
+    # mid-load then just looks stale and is picked up on the next refresh
+    file_version = model_file_version(model_path)
+    apply_model_data(joblib.load(model_path), file_version)
+
+def model_file_changed() -> bool:
+    # just a stat, cheap enough to run inline on every request
+    try:
+        file_version = model_file_version(MODEL_PATH)
+    except FileNotFoundError:
+        return False
+    state = model_state
+    if state is not None and state["file_version"] == file_version:
+        return False
+    return model_load_error is None or model_load_error[0] != file_version
+
+def refresh_model() -> Optional[Dict[str, Any]]:
+    # pick up a model saved by /train in another worker process (or loaded lazily here)
+    global model_load_error
+    if not model_file_changed():
+        return model_state
+    with model_reload_lock:
+        # another thread may have reloaded while this one waited
+        if model_file_changed():
+            try:
+                file_version = model_file_version(MODEL_PATH)
+                load_model(MODEL_PATH)
+                model_load_error = None
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                # keep serving the current model until the file changes again
+                model_load_error = (file_version, str(e))
+                print(f"Error loading model: {e}")
+    return model_state
+
+async def refresh_model_async() -> Optional[Dict[str, Any]]:
+    # for async handlers: the reload itself runs in a thread, off the event loop
+    if model_file_changed():
+        return await asyncio.to_thread(refresh_model)
+    return model_state
+
+def save_model(model_data: Dict[str, Any], model_path: str) -> tuple:
+    # dump to a temp file beside the target and rename it into place, so readers
+    # never see a partially written model
+    model_dir = os.path.dirname(model_path) or "."
+    os.makedirs(model_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        os.chmod(tmp_path, MODEL_FILE_MODE)
+        joblib.dump(model_data, tmp_path, protocol=pickle.HIGHEST_PROTOCOL, compress=('lz4', 3))
+        # taken before the rename so it describes this dump even if another worker saves right after
+        file_version = model_file_version(tmp_path)
+        os.replace(tmp_path, model_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return file_version
+
+async def score_batch(model_pipeline: Pipeline, scorer: Optional[Dict[str, Any]], items: List[tuple]):
+    try:
+        # rows are already in training order, so they go to the model as a plain object array;
+        # filled element-wise so a stray list value can't be broadcast into extra dimensions
+        batch = np.empty((len(items), len(items[0][2])), dtype=object)
+        for i, (_, _, row, _) in enumerate(items):
+            for j, value in enumerate(row):
+                batch[i, j] = value
+        preds, proba = await asyncio.to_thread(predict_frame, model_pipeline, scorer, batch)
+        for (_, _, _, future), pred, p in zip(items, preds, proba):
+            if not future.done():
+                future.set_result((int(pred), float(p)))
+    except Exception as e:
+        if len(items) > 1:
+            # one bad row shouldn't fail the requests it was batched with
+            for item in items:
+                await score_batch(model_pipeline, scorer, [item])
+            return
+        for _, _, _, future in items:
+            if not future.done():
+                future.set_exception(e)
+
+async def run_prediction_batcher(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await queue.get()]
+        deadline = loop.time() + PREDICT_BATCH_WINDOW
+        while len(items) < PREDICT_MAX_BATCH:
+            # take what is already queued without waiting
+            while len(items) < PREDICT_MAX_BATCH and not queue.empty():
+                items.append(queue.get_nowait())
+            if len(items) >= PREDICT_MAX_BATCH or loop.time() >= deadline:
+                break
+            # give requests still being validated one loop turn to join; a lone request
+            # goes straight to scoring
+            await asyncio.sleep(0)
+            if queue.empty():
+                break
+        # a retrain may land mid-window; score each request with the model it was validated against
+        groups: Dict[int, List[tuple]] = {}
+        for item in items:
+            groups.setdefault(id(item[0]), []).append(item)
+        for group in groups.values():
+            await score_batch(group[0][0], group[0][1], group)
+
+def get_prediction_queue() -> asyncio.Queue:
+    # created on first use as well as at startup, so /predict works even if the
+    # startup hook never ran on this event loop
+    global prediction_queue, prediction_worker
+    loop = asyncio.get_running_loop()
+    if prediction_worker is None or prediction_worker.done() or prediction_worker.get_loop() is not loop:
+        prediction_queue = asyncio.Queue()
+        prediction_worker = loop.create_task(run_prediction_batcher(prediction_queue))
+    return prediction_queue
+
+async def predict_batched(model_pipeline: Pipeline, scorer: Optional[Dict[str, Any]], row: List[Any]) -> tuple[int, float]:
+    future = asyncio.get_running_loop().create_future()
+    await get_prediction_queue().put((model_pipeline, scorer, row, future))
+    return await future
+
 @app.on_event("startup")
 async def startup_event():
-    global model, pipeline, feature_columns, target_column, categorical_columns, numerical_columns, categorical_values
-    model_path = "model/model.joblib"
-    if os.path.exists(model_path):
-        try:
-            model_data = joblib.load(model_path)
-            pipeline = model_data.get("pipeline")
-            feature_columns = model_data.get("feature_columns")
-            target_column = model_data.get("target_column")
-            categorical_columns = model_data.get("categorical_columns")
-            numerical_columns = model_data.get("numerical_columns")
-            categorical_values = model_data.get("categorical_values")
-            print("Model loaded successfully from model/model.joblib")
-        except Exception as e:
-            print(f"Error loading model: {e}")
+    get_prediction_queue()
+    if model_state is not None:
+        print("Model already loaded by the parent process; sharing it with this worker")
+    elif os.path.exists(MODEL_PATH):
+        if await refresh_model_async() is not None:
+            print(f"Model loaded successfully from {MODEL_PATH}")
     else:
         print("Model not found; API will serve /train to create one")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if prediction_worker is not None:
+        prediction_worker.cancel()
+
 @app.get("/")
 async def root():
     return {"message": "Churn Analysis API is running", "status": "healthy"}
@@ -125,34 +489,25 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "model_loaded": pipeline is not None
+        "model_loaded": model_state is not None
     }
 
 @app.get("/schema")
-async def get_schema():
-    global feature_columns, target_column, categorical_columns, numerical_columns, categorical_values
-    if feature_columns is None:
-        # attempt to read from saved model
-        model_path = "model/model.joblib"
-        if os.path.exists(model_path):
-            try:
-                model_data = joblib.load(model_path)
-                feature_columns = model_data.get("feature_columns")
-                target_column = model_data.get("target_column")
-                categorical_columns = model_data.get("categorical_columns")
-                numerical_columns = model_data.get("numerical_columns")
-                categorical_values = model_data.get("categorical_values")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Unable to load schema: {e}")
-        else:
-            raise HTTPException(status_code=400, detail="Schema not available. Train the model first.")
+def get_schema():
+    # reads the saved model if none is loaded yet, or a newer one has been saved
+    state = refresh_model()
+    if state is None:
+        if model_load_error is not None:
+            raise HTTPException(status_code=500, detail=f"Unable to load schema: {model_load_error[1]}")
+        raise HTTPException(status_code=400, detail="Schema not available. Train the model first.")
+    categorical_columns = state["categorical_columns"]
     fields = []
-    for col in feature_columns:
+    for col in state["feature_columns"]:
         if categorical_columns and col in categorical_columns:
             fields.append({
                 "name": col,
                 "type": "categorical",
-                "values": (categorical_values or {}).get(col, [])
+                "values": (state["categorical_values"] or {}).get(col, [])
             })
         else:
             fields.append({
@@ -160,107 +515,137 @@ async def get_schema():
                 "type": "number"
             })
     return {
-        "target": target_column,
+        "target": state["target_column"],
         "fields": fields
     }
 
 @app.post("/train", response_model=TrainingResponse)
-async def train_model(target: Optional[str] = None):
-    global model, pipeline, feature_columns, target_column, categorical_columns, numerical_columns, categorical_values
+def train_model(target: Optional[str] = None):
+    # declared sync so FastAPI runs it in the threadpool; the new model is built in
+    # locals and only published once complete, so concurrent predictions never see
+    # a half-trained pipeline
+    if not training_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Training is already in progress. Please retry once it finishes.")
     try:
         data_path = "../data/Churn_Modelling.csv"
         if not os.path.exists(data_path):
             raise HTTPException(status_code=404, detail="Data file not found. Please ensure data/Churn_Modelling.csv exists.")
-        df = pd.read_csv(data_path)
-        target_column = detect_target_column(df, target)
-        feature_columns = [c for c in df.columns if c != target_column and not c.lower().endswith('id')]
-        numerical_columns, categorical_columns = detect_column_types(df[feature_columns])
+        # the bundled Churn_Modelling schema is known up front; other files are inferred
+        columns = pd.read_csv(data_path, nrows=0).columns
+        known_schema = set(CHURN_DTYPES).issubset(columns) and (target is None or target in CHURN_DTYPES)
+        df = read_csv(data_path, dtype=CHURN_DTYPES if known_schema else None)
+        target_col = detect_target_column(df, target)
+        feature_cols = [c for c in df.columns if c != target_col and not c.lower().endswith('id')]
+        numerical_cols, categorical_cols = detect_column_types(df[feature_cols])
         # collect categorical values for schema
-        categorical_values = {c: sorted([str(v) for v in pd.Series(df[c]).dropna().unique().tolist()]) for c in (categorical_columns or [])}
-        X = df[feature_columns]
-        y = df[target_column]
+        cat_values = {c: np.sort(np.asarray(df[c].dropna().unique()).astype(str)).tolist() for c in (categorical_cols or [])}
+        X = df[feature_cols]
+        y = df[target_col]
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-        pipeline = create_pipeline(categorical_columns, numerical_columns)
-        pipeline.fit(X_train, y_train)
-        y_pred = pipeline.predict(X_test)
-        y_proba = pipeline.predict_proba(X_test)[:, 1]
+        trained_pipeline = create_pipeline(categorical_cols, numerical_cols)
+        trained_pipeline.fit(X_train, y_train)
+        scorer = build_linear_scorer(trained_pipeline, feature_cols, categorical_cols, numerical_cols)
+        y_pred = trained_pipeline.predict(X_test)
+        y_proba = trained_pipeline.predict_proba(X_test)[:, 1]
+        # derive the label metrics from one confusion matrix pass (zero_division=0 semantics)
+        cm = confusion_matrix(y_test, y_pred)
+        tn, fp, fn, tp = (int(v) for v in cm.ravel())
         metrics: Dict[str, Any] = {
-            "accuracy": float(accuracy_score(y_test, y_pred)),
-            "precision": float(precision_score(y_test, y_pred, zero_division=0)),
-            "recall": float(recall_score(y_test, y_pred, zero_division=0)),
-            "f1_score": float(f1_score(y_test, y_pred, zero_division=0)),
+            "accuracy": (tp + tn) / (tp + tn + fp + fn),
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+            "f1_score": 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
             "roc_auc": float(roc_auc_score(y_test, y_proba))
         }
-        cm = confusion_matrix(y_test, y_pred)
         metrics["confusion_matrix"] = {
-            "true_negatives": int(cm[0, 0]),
-            "false_positives": int(cm[0, 1]),
-            "false_negatives": int(cm[1, 0]),
-            "true_positives": int(cm[1, 1])
+            "true_negatives": tn,
+            "false_positives": fp,
+            "false_negatives": fn,
+            "true_positives": tp
+        }
+        model_data = {
+            "pipeline": trained_pipeline,
+            "linear_scorer": scorer,
+            "feature_columns": feature_cols,
+            "target_column": target_col,
+            "categorical_columns": categorical_cols,
+            "numerical_columns": numerical_cols,
+            "categorical_values": cat_values
         }
-        os.makedirs("model", exist_ok=True)
-        joblib.dump({
-            "pipeline": pipeline,
-            "feature_columns": feature_columns,
-            "target_column": target_column,
-            "categorical_columns": categorical_columns,
-            "numerical_columns": numerical_columns,
-            "categorical_values": categorical_values
-        }, "model/model.joblib")
-        model = pipeline
+        apply_model_data(model_data, save_model(model_data, MODEL_PATH))
         return TrainingResponse(
             message="Model trained successfully",
             metrics=metrics,
-            target_column=target_column,
-            feature_columns=feature_columns,
-            categorical_columns=categorical_columns,
-            numerical_columns=numerical_columns
+            target_column=target_col,
+            feature_columns=feature_cols,
+            categorical_columns=categorical_cols,
+            numerical_columns=numerical_cols
         )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Training error: {str(e)}")
+    finally:
+        training_lock.release()
 
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_single(input_data: Dict[str, Any]):
-    global pipeline, feature_columns
-    if pipeline is None:
+    # snapshot the model so a concurrent /train can't swap it mid-request
+    state = await refresh_model_async()
+    if state is None:
         raise HTTPException(
             status_code=400, 
             detail="Model not trained yet. Please train the model first using the /train endpoint."
         )
+    model_pipeline, model_scorer, model_features = state["pipeline"], state["linear_scorer"], state["feature_columns"]
+    model_feature_set, model_numerical_set = state["feature_columns_set"], state["numerical_columns_set"]
+    prediction_cache = state["prediction_cache"]
     try:
-        df_input = pd.DataFrame([input_data])
-        
         # Check for missing required columns
-        missing = set(feature_columns) - set(df_input.columns)
+        missing = model_feature_set.difference(input_data)
         if missing:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Missing required columns: {list(missing)}. Please ensure your input includes all required fields: {feature_columns}"
+                detail=f"Missing required columns: {list(missing)}. Please ensure your input includes all required fields: {model_features}"
             )
         
         # Check for extra columns (warn but don't fail)
-        extra = set(df_input.columns) - set(feature_columns)
+        extra = [c for c in input_data if c not in model_feature_set]
         if extra:
             print(f"Warning: Extra columns provided: {list(extra)}. These will be ignored.")
         
-        df_input = df_input[feature_columns]
+        # Repeated rows are answered from the cache without touching the model
+        row = [input_data[c] for c in model_features]
+        cache_key: Optional[tuple] = tuple(row)
+        try:
+            cached = prediction_cache.get(cache_key)
+        except TypeError:
+            # unhashable values (lists, objects) bypass the cache
+            cache_key, cached = None, None
+        if cached is not None:
+            prediction_cache.move_to_end(cache_key)
+            return PredictionResponse(prediction=cached[0], probability=cached[1])
         
         # Validate data types for numerical columns
-        if numerical_columns:
-            for col in numerical_columns:
-                if col in df_input.columns:
-                    try:
-                        df_input[col] = pd.to_numeric(df_input[col], errors='raise')
-                    except (ValueError, TypeError):
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"Column '{col}' must be numeric. Received: {df_input[col].iloc[0]}"
-                        )
+        for i, col in enumerate(model_features):
+            if col in model_numerical_set and not isinstance(row[i], (int, float)):
+                try:
+                    value = pd.to_numeric(row[i])
+                    if np.ndim(value) != 0:
+                        raise TypeError("expected a scalar")
+                except (ValueError, TypeError):
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Column '{col}' must be numeric. Received: {row[i]}"
+                    )
+                row[i] = value
         
-        pred = pipeline.predict(df_input)[0]
-        proba = pipeline.predict_proba(df_input)[0, 1]
+        # coalesced with concurrent requests into one predict_proba call, run off the event loop
+        pred, proba = await predict_batched(model_pipeline, model_scorer, row)
+        if cache_key is not None:
+            prediction_cache[cache_key] = (pred, proba)
+            if len(prediction_cache) > PREDICTION_CACHE_SIZE:
+                prediction_cache.popitem(last=False)
         return PredictionResponse(prediction=int(pred), probability=float(proba))
     except HTTPException:
         raise
@@ -268,58 +653,78 @@ async def predict_single(input_data: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 @app.post("/predict-batch")
-async def predict_batch(file: UploadFile = File(...)):
-    global pipeline, feature_columns
-    if pipeline is None:
+def predict_batch(file: UploadFile = File(...)):
+    # sync handler: parsing and scoring run in FastAPI's threadpool, not on the event loop
+    state = refresh_model()
+    if state is None:
         raise HTTPException(
             status_code=400, 
             detail="Model not trained yet. Please train the model first using the /train endpoint."
         )
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV file. Please upload a .csv file.")
+    model_pipeline, model_scorer, model_features, model_numerical = state["pipeline"], state["linear_scorer"], state["feature_columns"], state["numerical_columns"]
+    model_feature_set = state["feature_columns_set"]
     try:
-        content = await file.read()
-        df = pd.read_csv(io.StringIO(content.decode('utf-8')))
+        columns = pd.read_csv(file.file, nrows=0).columns
         
         # Check for missing required columns
-        missing = set(feature_columns) - set(df.columns)
+        missing = model_feature_set.difference(columns)
         if missing:
             raise HTTPException(
                 status_code=400, 
-                detail=f"CSV is missing required columns: {list(missing)}. Your CSV must include all required columns: {feature_columns}"
+                detail=f"CSV is missing required columns: {list(missing)}. Your CSV must include all required columns: {model_features}"
             )
         
         # Check for extra columns (warn but don't fail)
-        extra = set(df.columns) - set(feature_columns)
+        extra = [c for c in columns if c not in model_feature_set]
         if extra:
             print(f"Warning: CSV contains extra columns: {list(extra)}. These will be ignored during prediction.")
         
-        df_features = df[feature_columns]
+        # Validate data types for numerical columns over the whole upload before streaming,
+        # since an error raised once the response has started can only truncate it
+        if model_numerical:
+            file.file.seek(0)
+            for part in pd.read_csv(file.file, usecols=model_numerical, chunksize=BATCH_CHUNK_SIZE):
+                part, bad_col = coerce_numeric_columns(part, model_numerical)
+                if bad_col:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Column '{bad_col}' must contain only numeric values. Found non-numeric values in your CSV."
+                    )
+                # blanks and inf parse as numbers but can't be scored
+                finite = np.isfinite(part[model_numerical].to_numpy(dtype=float)).all(axis=0)
+                if not finite.all():
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Column '{model_numerical[int(np.argmin(finite))]}' contains missing or infinite values. Please fill them with numbers."
+                    )
         
-        # Validate data types for numerical columns
-        if numerical_columns:
-            for col in numerical_columns:
-                if col in df_features.columns:
-                    try:
-                        df_features[col] = pd.to_numeric(df_features[col], errors='raise')
-                    except (ValueError, TypeError):
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"Column '{col}' must contain only numeric values. Found non-numeric values in your CSV."
-                        )
+        # Score the upload chunk by chunk so only one chunk is held in memory at a time
+        file.file.seek(0)
+        chunks = pd.read_csv(file.file, chunksize=BATCH_CHUNK_SIZE)
+        first_chunk = next(chunks, None)
+        if first_chunk is None or first_chunk.empty:
+            raise HTTPException(status_code=400, detail="CSV file contains no rows.")
+        
+        def score_chunk(chunk: pd.DataFrame, header: bool) -> bytes:
+            df_features, bad_col = coerce_numeric_columns(chunk[model_features], model_numerical or [])
+            if bad_col:
+                raise ValueError(f"Column '{bad_col}' must contain only numeric values.")
+            # the chunk is ours alone, so the columns are added in place rather than on a copy
+            chunk['Prediction'], chunk['Probability'] = predict_frame_parallel(model_pipeline, model_scorer, df_features)
+            return chunk.to_csv(index=False, header=header).encode('utf-8')
         
-        preds = pipeline.predict(df_features)
-        probas = pipeline.predict_proba(df_features)[:, 1]
-        df_out = df.copy()
-        df_out['Prediction'] = preds
-        df_out['Probability'] = probas
+        # Score the first chunk eagerly so model errors still surface before the response starts
+        first_body = score_chunk(first_chunk, header=True)
         
-        # Convert to CSV string
-        csv_content = df_out.to_csv(index=False)
+        def stream_predictions():
+            yield first_body
+            for chunk in chunks:
+                yield score_chunk(chunk, header=False)
         
-        # Create streaming response with proper headers
         return StreamingResponse(
-            io.StringIO(csv_content),
+            stream_predictions(),
             media_type="text/csv",
             headers={
                 "Content-Disposition": f"attachment; filename=predictions_{file.filename}",
@@ -333,14 +738,15 @@ async def predict_batch(file: UploadFile = File(...)):
 
 @app.get("/model-info")
 async def get_model_info():
-    if pipeline is None:
+    state = await refresh_model_async()
+    if state is None:
         return {"error": "Model not trained"}
     return {
-        "target_column": target_column,
-        "feature_columns": feature_columns,
-        "categorical_columns": categorical_columns,
-        "numerical_columns": numerical_columns,
-        "model_type": type(pipeline.named_steps['classifier']).__name__
+        "target_column": state["target_column"],
+        "feature_columns": state["feature_columns"],
+        "categorical_columns": state["categorical_columns"],
+        "numerical_columns": state["numerical_columns"],
+        "model_type": type(state["pipeline"].named_steps['classifier']).__name__
     }
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ Run this after starting the backend server
 
 import requests
 import json
+import numpy as np
 import pandas as pd
 from io import StringIO
 
@@ -113,6 +114,72 @@ def test_predict_batch():
         print(f"Error: {response.text}")
     print()
 
+def test_scorer_parity():
+    """Compare the fused linear scorer with the sklearn pipeline on the bundled CSV"""
+    print("Checking scorer parity against the sklearn pipeline...")
+    
+    # Runs in-process on the model saved by /train
+    import main as app_main
+    app_main.load_model(app_main.MODEL_PATH)
+    state = app_main.model_state
+    if state["linear_scorer"] is None:
+        print("Model has no linear scorer; predictions use the pipeline directly")
+        print()
+        return
+    
+    df = pd.read_csv("../data/Churn_Modelling.csv")[state["feature_columns"]]
+    model_pipeline = state["pipeline"]
+    expected_preds = model_pipeline.predict(df)
+    expected_probas = model_pipeline.predict_proba(df)[:, 1]
+    
+    # DataFrame chunks come from /predict-batch, object arrays from /predict
+    for X in (df, df.to_numpy(dtype=object)):
+        preds, probas = app_main.predict_frame(model_pipeline, state["linear_scorer"], X)
+        mismatches = int((preds != expected_preds).sum())
+        max_diff = float(np.abs(probas - expected_probas).max())
+        print(f"{type(X).__name__}: {mismatches} label mismatches, max probability difference {max_diff:.2e}")
+        assert mismatches == 0, "scorer labels differ from pipeline.predict"
+        assert max_diff < 1e-9, "scorer probabilities differ from pipeline.predict_proba"
+    print()
+
+def test_predict_batch_format():
+    """Check /predict-batch output is formatted like pandas' to_csv of the input"""
+    print("Checking /predict-batch output format...")
+    
+    # Enough rows for several streamed chunks, with a value that needs quoting
+    df = pd.read_csv("../data/Churn_Modelling.csv")
+    df = pd.concat([df] * 6, ignore_index=True)
+    df.loc[len(df) - 1, "Surname"] = "Smith, Jr"
+    
+    files = {'file': ('format_check.csv', df.to_csv(index=False), 'text/csv')}
+    response = requests.post(f"{BASE_URL}/predict-batch", files=files)
+    print(f"Status: {response.status_code}")
+    assert response.status_code == 200, response.text
+    
+    result = pd.read_csv(StringIO(response.text), float_precision="round_trip")
+    assert len(result) == len(df), f"expected {len(df)} rows, got {len(result)}"
+    expected = df.assign(Prediction=result["Prediction"], Probability=result["Probability"]).to_csv(index=False)
+    for line_no, (got, want) in enumerate(zip(response.text.splitlines(), expected.splitlines()), start=1):
+        assert got == want, f"line {line_no} differs:\n  got:      {got}\n  expected: {want}"
+    print("Output matches pandas CSV formatting")
+    print()
+
+def test_predict_batch_missing_values():
+    """Check /predict-batch rejects blank or infinite numbers anywhere in the file"""
+    print("Checking /predict-batch rejects missing numeric values past the first chunk...")
+    
+    # The bad values sit after the first streamed chunk, so they must be caught up front
+    df = pd.read_csv("../data/Churn_Modelling.csv")
+    df = pd.concat([df] * 6, ignore_index=True)
+    for value in ("", "inf"):
+        bad = df.astype({"Age": object})
+        bad.loc[55_000, "Age"] = value
+        files = {'file': ('missing_values.csv', bad.to_csv(index=False), 'text/csv')}
+        response = requests.post(f"{BASE_URL}/predict-batch", files=files)
+        print(f"Age={value!r}: status {response.status_code}, {response.text}")
+        assert response.status_code == 400, f"expected 400, got {response.status_code}"
+    print()
+
 def main():
     """Run all tests"""
     print("Churn Analysis API Test Suite")
@@ -125,6 +192,9 @@ def main():
         test_model_info()
         test_predict()
         test_predict_batch()
+        test_scorer_parity()
+        test_predict_batch_format()
+        test_predict_batch_missing_values()
         
         print("All tests completed!")
         